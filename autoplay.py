@@ -0,0 +1,184 @@
+"""Autoplay agent: breadth-first search toward food on the wrapping grid.
+
+The agent finds the shortest path to the food around obstacles and its own
+body, taking the board's wrap-around edges into account.  Before taking
+the first step of that path it checks that its tail is still reachable
+from there, so it does not trap itself; otherwise it follows its tail, and
+as a last resort moves to the neighbouring cell with the most open space.
+Each search stops after ``search_limit`` cells, so a tick costs the same on
+any board size; food beyond that range is approached head-on until the
+search can reach it.
+
+Run it headless as a benchmark / soak test:
+    python autoplay.py --games 10 --seed 1
+    python autoplay.py --grid 4000x4000 --max-ticks 100000
+"""
+import argparse
+import time
+
+from snake_env import SnakeEnv, width, height, block_size, parse_grid, LEFT, RIGHT, UP, DOWN
+
+
+class AutoPlayer:
+    """Chooses a direction for ``env`` each tick."""
+
+    search_limit = 4096  # Most cells one search may reach, so big boards cost the same per tick
+
+    def __init__(self, env):
+        self.env = env
+        self.truncated = False  # Whether the last search stopped at search_limit
+
+    def neighbours(self, cell):
+        env = self.env
+        y, x = divmod(cell, env.cols)
+        row = y * env.cols
+        return ((row + (x - 1) % env.cols, LEFT),
+                (row + (x + 1) % env.cols, RIGHT),
+                (((y - 1) % env.rows) * env.cols + x, UP),
+                (((y + 1) % env.rows) * env.cols + x, DOWN))
+
+    def distance(self, a, b):
+        """Moves between cells ``a`` and ``b`` on an empty board, through the wrapping edges."""
+        env = self.env
+        (ax, ay), (bx, by) = env.position(a), env.position(b)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        return min(dx, env.cols - dx) + min(dy, env.rows - dy)
+
+    def avoided_special(self):
+        # 不去吃减命的特殊食物
+        env = self.env
+        if env.special_food_active and env.special_food_type == "remove_life":
+            return env.special_food_pos
+        return None
+
+    def blocked(self, cell):
+        env = self.env
+        return bool(env.occupied[cell]) or cell in env.obstacles or cell == self.avoided_special()
+
+    def search(self, start, goal, free_cell=None, count=False):
+        """Breadth-first search from ``start``.
+
+        Returns the first cell on a shortest path to ``goal`` (None if it
+        cannot be reached), or with ``count=True`` the number of cells
+        reachable from ``start``.  ``free_cell`` is treated as empty even if
+        the snake is on it (the tail, which moves away on the next tick).
+        A search gives up after reaching ``search_limit`` cells and sets
+        ``truncated``; there is then plenty of room but no answer.
+        """
+        env = self.env
+        cols = env.cols
+        rows = env.rows
+        occupied = env.occupied
+        obstacles = env.obstacles
+        avoid = self.avoided_special()
+
+        limit = self.search_limit
+        self.truncated = False
+        parent = {start: start}
+        queue = [start]
+        for cell in queue:
+            y, x = divmod(cell, cols)
+            row = cell - x
+            for nxt in (row + (x - 1) % cols, row + (x + 1) % cols,
+                        ((y - 1) % rows) * cols + x, ((y + 1) % rows) * cols + x):
+                if nxt in parent:
+                    continue
+                parent[nxt] = cell
+                if nxt == goal:
+                    # Walk back to the cell right after start
+                    while cell != start:
+                        nxt, cell = cell, parent[cell]
+                    return nxt
+                if (occupied[nxt] or nxt in obstacles or nxt == avoid) and nxt != free_cell:
+                    continue
+                queue.append(nxt)
+            if len(queue) >= limit:
+                self.truncated = True
+                break
+        return len(queue) if count else None
+
+    def safe(self, cell):
+        """Whether the snake can still reach its tail after moving to ``cell``."""
+        env = self.env
+        if len(env.snake) < 3:
+            return True
+        return self.search(cell, env.snake[0], free_cell=env.snake[0]) is not None or self.truncated
+
+    def choose(self):
+        env = self.env
+        head = env.head
+        reverse = (-env.direction[0], -env.direction[1])
+        moves = {cell: d for cell, d in self.neighbours(head) if d != reverse}
+        tail = env.snake[0] if len(env.snake) > 1 else None
+
+        if env.food is not None:
+            # 食物太远时搜索够不着，就先朝食物的方向走
+            far = 2 * self.distance(head, env.food) ** 2 > self.search_limit
+            step = None
+            if not far:
+                step = self.search(head, env.food, free_cell=tail)
+                far = self.truncated
+            if step in moves and self.safe(step):
+                return moves[step]
+            if far:
+                for cell in sorted(moves, key=lambda cell: self.distance(cell, env.food)):
+                    if (not self.blocked(cell) or cell == tail) and self.safe(cell):
+                        return moves[cell]
+
+        if tail is not None:
+            step = self.search(head, tail, free_cell=tail)
+            if step in moves:
+                return moves[step]
+
+        # 没有安全路线时，往空间最大的方向走
+        best = None
+        best_space = -1
+        for cell, d in moves.items():
+            if self.blocked(cell) and cell != tail:
+                continue
+            space = self.search(cell, None, free_cell=tail, count=True)
+            if space > best_space:
+                best, best_space = d, space
+        return best
+
+
+def benchmark(games=1, seed=None, max_ticks=None, width=width, height=height, block_size=block_size):
+    """Play ``games`` headless autoplay games and return one result dict per game."""
+    env = SnakeEnv(width, height, block_size, seed=seed)
+    player = AutoPlayer(env)
+    results = []
+    for game in range(games):
+        if game:
+            env.reset()
+        start = time.perf_counter()
+        while not env.game_over and (max_ticks is None or env.tick < max_ticks):
+            env.step(player.choose())
+        elapsed = time.perf_counter() - start
+        results.append({
+            "score": env.score,
+            "level": env.level,
+            "length": len(env.snake),
+            "ticks": env.tick,
+            "ticks_per_second": env.tick / elapsed if elapsed else 0.0,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless autoplay games as a benchmark.")
+    parser.add_argument("--games", type=int, default=1, help="number of games to play")
+    parser.add_argument("--seed", type=int, help="random seed for the first game")
+    parser.add_argument("--max-ticks", type=int, help="stop each game after this many ticks")
+    parser.add_argument("--grid", type=parse_grid, metavar="COLSxROWS", help="board size in cells")
+    args = parser.parse_args()
+
+    board_width, board_height = width, height
+    if args.grid:
+        board_width, board_height = args.grid[0] * block_size, args.grid[1] * block_size
+    for i, result in enumerate(benchmark(args.games, args.seed, args.max_ticks, board_width, board_height)):
+        print(f"game {i + 1}: score {result['score']}, level {result['level']}, length {result['length']}, "
+              f"{result['ticks']} ticks, {result['ticks_per_second']:.0f} ticks/s")
+
+if __name__ == "__main__":
+    main()
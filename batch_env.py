@@ -0,0 +1,305 @@
+"""Vectorized snake engine: many boards advanced by one NumPy call.
+
+``BatchSnakeEnv`` follows the same rules as ``SnakeEnv`` in snake_env.py
+(wrapping, obstacles, normal and special food, lives and level-ups), but
+holds N boards as arrays and steps all of them at once.  Boards whose game
+ends are reset automatically at the end of the step, so the batch never
+stalls waiting on a slow board.
+
+Cells are packed as ``y * cols + x``.  Actions are indices into
+``DIRECTIONS`` (``0`` left, ``1`` right, ``2`` up, ``3`` down) or ``-1`` to
+keep going straight.
+
+Every board has its own random stream: a key spawned from the batch seed
+with ``SeedSequence`` plus a count of the draws that board has made, hashed
+with SplitMix64.  A board's games therefore depend only on the seed, its
+index and its own actions, not on ``n`` or on what the other boards do.
+The streams are not Python's ``random``, so a board does not play the same
+game as ``SnakeEnv`` with the same seed.
+"""
+import numpy as np
+
+from snake_env import (width, height, block_size, initial_speed, initial_lives, level_up_score,
+                       special_food_types, special_food_chance, special_food_duration,
+                       LEFT, RIGHT, UP, DOWN)
+
+DIRECTIONS = (LEFT, RIGHT, UP, DOWN)
+NO_ACTION = -1
+
+# Cell codes returned by BatchSnakeEnv.occupancy()
+EMPTY = 0
+SNAKE = 1
+OBSTACLE = 2
+FOOD = 3
+SPECIAL_FOOD = 4
+
+_dx = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+_dy = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+_axis = np.array([0 if d[0] != 0 else 1 for d in DIRECTIONS], dtype=np.int8)
+
+# SplitMix64 constants
+_golden = np.uint64(0x9E3779B97F4A7C15)
+_mix1 = np.uint64(0xBF58476D1CE4E5B9)
+_mix2 = np.uint64(0x94D049BB133111EB)
+
+_special_names = list(special_food_types.keys())
+_special_effects = np.array([special_food_types[name]["effect"] for name in _special_names])
+
+
+class BatchSnakeEnv:
+    """N independent games of snake stepped together.
+
+    State is public and read-only for callers:
+
+    * ``snake_count`` -- ``(n, cells)`` number of snake segments on each cell
+    * ``obstacles`` -- ``(n, cells)`` obstacle mask
+    * ``body`` -- ``(n, cells + 1)`` ring buffer of packed body cells, the head at
+      ``body[i, head_index[i]]`` and ``length[i]`` segments ending there
+    * ``head``, ``food`` and ``special_food`` (``-1`` when absent) -- packed cells
+    * ``score``, ``level``, ``lives``, ``snake_speed``, ``tick`` -- per board
+    """
+
+    def __init__(self, n, width=width, height=height, block_size=block_size, seed=None):
+        self.n = n
+        self.cols = width // block_size
+        self.rows = height // block_size
+        self.cells = self.cols * self.rows
+        self.capacity = self.cells + 1  # one spare slot so a full-board push never overwrites the tail
+        self.center = (self.rows // 2) * self.cols + self.cols // 2
+        # Per-board random streams: stream_keys[i] with draw counter draws[i]
+        self.stream_keys = np.array([child.generate_state(1, np.uint64)[0]
+                                     for child in np.random.SeedSequence(seed).spawn(n)], dtype=np.uint64)
+        self.draws = np.zeros(n, dtype=np.uint64)
+        self._all = np.arange(n)
+
+        self.snake_count = np.zeros((n, self.cells), dtype=np.int16)
+        self.obstacles = np.zeros((n, self.cells), dtype=bool)
+        self.body = np.zeros((n, self.capacity), dtype=np.int32)
+        self.head_index = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.snake_length = np.zeros(n, dtype=np.int32)
+        self.head = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.special_food = np.zeros(n, dtype=np.int32)
+        self.special_food_type = np.zeros(n, dtype=np.int8)
+        self.special_food_tick = np.zeros(n, dtype=np.int32)
+        self.special_food_ticks = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.level = np.zeros(n, dtype=np.int32)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.snake_speed = np.zeros(n, dtype=np.int32)
+        self.tick = np.zeros(n, dtype=np.int32)
+
+        self.reset()
+
+    def reset(self, boards=None):
+        """Start new games on ``boards`` (all boards by default)."""
+        idx = self._all if boards is None else np.asarray(boards)
+        if idx.size == 0:
+            return
+
+        self.snake_count[idx] = 0
+        self.length[idx] = 0
+        self.snake_length[idx] = 1
+        self.head_index[idx] = 0
+        self.head[idx] = self.center
+        self.direction[idx] = DIRECTIONS.index(RIGHT)
+        self.snake_speed[idx] = initial_speed
+        self.level[idx] = 1
+        self.lives[idx] = initial_lives
+        self.score[idx] = 0
+        self.tick[idx] = 0
+        self.special_food[idx] = -1
+        self.food[idx] = -1
+        self.obstacles[idx] = False
+        self.food[idx] = self._random_free_cells(idx)
+        self._generate_obstacles(idx)
+
+    @staticmethod
+    def _mix(x):
+        # SplitMix64 finalizer; uint64 arithmetic wraps, which is what it wants
+        x ^= x >> np.uint64(30)
+        x *= _mix1
+        x ^= x >> np.uint64(27)
+        x *= _mix2
+        x ^= x >> np.uint64(31)
+        return x
+
+    def _uniform(self, idx, size):
+        """Return ``(idx.size, size)`` floats in [0, 1), one draw from each board's own stream."""
+        with np.errstate(over="ignore"):
+            base = self._mix(self.stream_keys[idx] + self.draws[idx] * _golden)
+            x = self._mix(base[:, None] + np.arange(1, size + 1, dtype=np.uint64) * _golden)
+        self.draws[idx] += np.uint64(1)
+        return (x >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def _integers(self, idx, low, high):
+        """One integer in ``[low, high)`` per board in ``idx``."""
+        return low + (self._uniform(idx, 1)[:, 0] * (high - low)).astype(np.int64)
+
+    def _random_keys(self, idx):
+        # Uniform random sort keys per cell, with cells holding snake,
+        # obstacles, food or special food pushed to 2.0.  The smallest keys
+        # are a uniform draw over empty cells without a retry loop.
+        keys = self._uniform(idx, self.cells)
+        keys[(self.snake_count[idx] > 0) | self.obstacles[idx]] = 2.0
+        rows = np.arange(idx.size)
+        for taken in (self.food[idx], self.special_food[idx]):
+            keys[rows[taken >= 0], taken[taken >= 0]] = 2.0
+        return keys
+
+    def _random_free_cells(self, idx):
+        """Return one random empty cell per board in ``idx``, -1 where the board is full."""
+        keys = self._random_keys(idx)
+        cells = keys.argmin(axis=1)
+        cells[keys[np.arange(idx.size), cells] >= 2.0] = -1
+        return cells
+
+    def _generate_obstacles(self, idx):
+        self.obstacles[idx] = False
+        keys = self._random_keys(idx)
+        order = np.argsort(keys, axis=1)
+        free = (keys < 2.0).sum(axis=1)
+        count = np.minimum(self.level[idx], free)
+        take = np.arange(self.cells)[None, :] < count[:, None]
+
+        rows = np.broadcast_to(idx[:, None], take.shape)
+        self.obstacles[rows[take], order[take]] = True
+
+    def _lose_life(self, mask):
+        self.lives[mask] -= 1
+        return mask & (self.lives <= 0)
+
+    def step(self, actions=None):
+        """Advance every board one tick.
+
+        Returns a dict of ``(n,)`` arrays: boolean ``food``, ``special_food``,
+        ``level_up``, ``obstacle``, ``self``, ``board_full`` and ``done`` event flags, plus
+        ``score`` holding each board's score before any auto-reset.
+        """
+        n = self.n
+        ar = self._all
+        self.tick += 1
+
+        if actions is not None:
+            actions = np.asarray(actions)
+            act = np.clip(actions, 0, len(DIRECTIONS) - 1)
+            turn = (actions >= 0) & (_axis[act] != _axis[self.direction])
+            self.direction[turn] = act[turn]
+
+        # 更新蛇的坐标，超出边界时从另一侧出现
+        x = (self.head % self.cols + _dx[self.direction]) % self.cols
+        y = (self.head // self.cols + _dy[self.direction]) % self.rows
+        self.head = y * self.cols + x
+
+        # 检查是否撞到障碍物
+        hit_obstacle = self.obstacles[ar, self.head]
+        done = self._lose_life(hit_obstacle)
+        respawn = hit_obstacle & ~done
+        if respawn.any():
+            idx = np.flatnonzero(respawn)
+            self.snake_count[idx] = 0
+            self.length[idx] = 0
+            self.snake_length[idx] = 1
+            self.head[idx] = self.center
+            self.snake_speed[idx] = initial_speed
+            self._generate_obstacles(idx)
+        live = ~done
+
+        # 特殊食物生成逻辑
+        inactive = self.special_food < 0
+        spawn = live & inactive & (self._integers(ar, 1, 101) > 100 - special_food_chance)
+        if spawn.any():
+            idx = np.flatnonzero(spawn)
+            self.special_food_type[idx] = self._integers(idx, 0, len(_special_names))
+            self.special_food[idx] = self._random_free_cells(idx)
+            self.special_food_tick[idx] = self.tick[idx]
+            self.special_food_ticks[idx] = special_food_duration * self.snake_speed[idx]
+
+        # 如果特殊食物的存在时间超过设定时长，则将其移除
+        expired = (self.special_food >= 0) & (self.tick - self.special_food_tick > self.special_food_ticks)
+        self.special_food[expired] = -1
+
+        # 更新蛇的身体: push the head, then pop the tail if the snake is too long
+        live_idx = np.flatnonzero(live)
+        heads = self.head[live_idx]
+        self.head_index[live_idx] = (self.head_index[live_idx] + 1) % self.capacity
+        self.body[live_idx, self.head_index[live_idx]] = heads
+        self.snake_count[live_idx, heads] += 1
+        self.length[live_idx] += 1
+
+        pop = live & (self.length > self.snake_length)
+        pop_idx = np.flatnonzero(pop)
+        tail = self.body[pop_idx, (self.head_index[pop_idx] - self.length[pop_idx] + 1) % self.capacity]
+        self.snake_count[pop_idx, tail] -= 1
+        self.length[pop_idx] -= 1
+
+        # 检查蛇是否撞到自己
+        hit_self = live & (self.snake_count[ar, self.head] > 1)
+        done |= self._lose_life(hit_self)
+        live = ~done
+
+        # 检查是否吃到普通食物
+        ate = live & (self.head == self.food)
+        level_up = np.zeros(n, dtype=bool)
+        if ate.any():
+            idx = np.flatnonzero(ate)
+            self.food[idx] = -1
+            self.food[idx] = self._random_free_cells(idx)
+            self.snake_length[idx] += 1
+            self.score[idx] += 1
+            self.snake_speed[idx] += 1
+
+            # 每5分增加一次等级，增加障碍物
+            level_up[idx] = self.score[idx] % level_up_score == 0
+            if level_up.any():
+                up = np.flatnonzero(level_up)
+                self.level[up] += 1
+                self._generate_obstacles(up)
+                self.snake_speed[up] += 2
+
+        # A snake can never be longer than the board
+        np.minimum(self.snake_length, self.cells, out=self.snake_length)
+
+        # 检查是否吃到特殊食物
+        ate_special = live & (self.special_food >= 0) & (self.head == self.special_food)
+        if ate_special.any():
+            effect = np.where(ate_special, _special_effects[self.special_food_type], "")
+            speed_up = effect == "speed_up"
+            slow_down = effect == "slow_down"
+            self.snake_speed[speed_up] += 5
+            self.snake_speed[slow_down] = np.maximum(self.snake_speed[slow_down] - 5, 5)
+            self.lives[effect == "add_life"] += 1
+            done |= self._lose_life(effect == "remove_life")
+            self.special_food[ate_special] = -1
+
+        # 棋盘满了就没有地方放食物，等有空格子再放
+        board_full = live & (self.food < 0)
+        if board_full.any():
+            idx = np.flatnonzero(board_full)
+            self.food[idx] = self._random_free_cells(idx)
+            board_full[idx] = self.food[idx] < 0
+
+        events = {
+            "food": ate,
+            "special_food": ate_special,
+            "level_up": level_up,
+            "obstacle": hit_obstacle,
+            "self": hit_self,
+            "done": done,
+            "board_full": board_full,
+            "score": self.score.copy(),
+        }
+        self.reset(np.flatnonzero(done))
+        return events
+
+    def occupancy(self):
+        """Return a ``(n, rows, cols)`` int8 grid of EMPTY/SNAKE/OBSTACLE/FOOD/SPECIAL_FOOD codes."""
+        grid = np.where(self.snake_count > 0, SNAKE, EMPTY).astype(np.int8)
+        grid[self.obstacles] = OBSTACLE
+        placed = np.flatnonzero(self.food >= 0)
+        grid[placed, self.food[placed]] = FOOD
+        active = np.flatnonzero(self.special_food >= 0)
+        grid[active, self.special_food[active]] = SPECIAL_FOOD
+        return grid.reshape(self.n, self.rows, self.cols)
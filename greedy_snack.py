@@ -1,21 +1,36 @@
-import pygame
-import random
-import json
-import os
+import argparse
+import functools
+import importlib.util
 import logging
+import os
+import sys
 import time
-
-# Set up logging
-logging.basicConfig(filename='snake_game.log', level=logging.DEBUG)
-
-# Initialize Pygame
-pygame.init()
-
-# Set up the game window
+from collections import deque
+
+from snake_env import special_food_types, parse_grid, LEFT, RIGHT, UP, DOWN
+from scores import ScoreStore, bot_players, high_scores_file
+from replay import Recording
+from autoplay import AutoPlayer, benchmark
+from telemetry import FrameProfiler, null_profiler, start_logging
+
+
+def lazy_import(name):
+    # Importing pygame takes ~200 ms; defer loading it until first use so
+    # headless runs, tools and tests can import this module cheaply
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+pygame = lazy_import("pygame")
+
+# Game window size
 width = 800
 height = 600
-window = pygame.display.set_mode((width, height))
-pygame.display.set_caption("Snake Game")
 
 # Colors
 BLACK = (0, 0, 0)
@@ -24,107 +39,169 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
 
 # Snake and food properties
 block_size = 20
-initial_speed = 8
-snake_speed = initial_speed
-level = 1  # Add levels
-lives = 3  # Add lives
 
-# Font for display
-font = pygame.font.SysFont(None, 30)
-large_font = pygame.font.SysFont(None, 50)
+# Frame pacing: the game advances at snake_speed ticks per second while the
+# screen is redrawn at most max_fps times per second
+max_fps = 60
+max_ticks_per_frame = 10  # Catch-up limit after a long stall, so the game never spirals
+max_queued_turns = 3  # Turns pressed between ticks, applied one per tick
+
+# Boards bigger than the window scroll to keep the head at least this many
+# cells from the edge of the view
+scroll_margin = 5
 
-# High scores file
-high_scores_file = "high_scores.json"
+# Font for display: None is the font file bundled with pygame, which loads
+# without scanning the system's fonts the way SysFont does
+font_file = None
 
 # Sound effects (you can replace with your own sound files)
-pygame.mixer.init()
-eat_sound = pygame.mixer.Sound('eat.wav')
-game_over_sound = pygame.mixer.Sound('game_over.wav')
+eat_sound = 'eat.wav'
+game_over_sound = 'game_over.wav'
 background_music = 'background.mp3'  # Example for background music
 
-# Load background music
-pygame.mixer.music.load(background_music)
-pygame.mixer.music.set_volume(0.5)
-pygame.mixer.music.play(-1)  # Loop the background music
-
-# Special food types
-special_food_types = {
-    "speed_up": {"color": YELLOW, "effect": "speed_up"},
-    "slow_down": {"color": BLUE, "effect": "slow_down"},
-    "add_life": {"color": (0, 255, 255), "effect": "add_life"},
-    "remove_life": {"color": (128, 0, 128), "effect": "remove_life"}
-}
-
-special_food_spawn_time = random.randint(10, 20)  # Time before spawning special food
-special_food_duration = 8  # How long the special food stays on screen
-
-
-def load_high_scores():
-    try:
-        if os.path.exists(high_scores_file):
-            with open(high_scores_file, "r") as f:
-                return json.load(f)
-        return [0, 0, 0]
-    except Exception as e:
-        logging.error(f"Error loading high scores: {e}")
-        return [0, 0, 0]
-
-def save_high_scores(scores):
-    try:
-        with open(high_scores_file, "w") as f:
-            json.dump(scores, f)
-    except Exception as e:
-        logging.error(f"Error saving high scores: {e}")
-
-# Load high scores
-high_scores = load_high_scores()
-
-def draw_snake(snake_list):
-    for block in snake_list:
-        pygame.draw.rect(window, GREEN, [block[0], block[1], block_size, block_size])
-
-def draw_food(food_pos, food_type="normal"):
-    if food_type == "normal":
-        pygame.draw.rect(window, RED, [food_pos[0], food_pos[1], block_size, block_size])
-    else:
-        # Draw special food with a unique color
-        pygame.draw.rect(window, special_food_types[food_type]["color"], [food_pos[0], food_pos[1], block_size, block_size])
+
+class App:
+    """The window, fonts, sounds and score store, each set up on first use.
+
+    Nothing is initialized when this module is imported.  With
+    ``display=False`` drawing goes to SDL's off-screen dummy driver, and with
+    ``audio=False`` the mixer is never started and sounds are skipped.
+    """
+
+    def __init__(self, display=True, audio=True, player=None):
+        self.display = display
+        self.audio = audio
+        self.player = player
+        self.sounds = {}
+
+    @functools.cached_property
+    def window(self):
+        if not self.display:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pygame.display.init()
+        window = pygame.display.set_mode((width, height))
+        pygame.display.set_caption("Snake Game")
+        return window
+
+    @functools.cached_property
+    def font(self):
+        pygame.font.init()
+        return pygame.font.Font(font_file, 30)
+
+    @functools.cached_property
+    def large_font(self):
+        pygame.font.init()
+        return pygame.font.Font(font_file, 50)
+
+    @functools.cached_property
+    def mixer(self):
+        if not self.audio:
+            return None
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            logging.error(f"Error starting audio: {e}")
+            return None
+        return pygame.mixer
+
+    @functools.cached_property
+    def store(self):
+        return ScoreStore(import_json=high_scores_file)
+
+    @functools.cached_property
+    def high_scores(self):
+        return self.store.high_scores(exclude=bot_players)
+
+    def play_sound(self, path):
+        if self.mixer is None:
+            return
+        if path not in self.sounds:
+            self.sounds[path] = self.mixer.Sound(path)
+        self.sounds[path].play()
+
+    def play_music(self, path):
+        if self.mixer is None:
+            return
+        self.mixer.music.load(path)
+        self.mixer.music.set_volume(0.5)
+        self.mixer.music.play(-1)  # Loop the background music
+
+app = App()
+
+@functools.lru_cache(maxsize=None)
+def key_directions():
+    # Arrow keys mapped to snake directions
+    return {
+        pygame.K_LEFT: LEFT,
+        pygame.K_RIGHT: RIGHT,
+        pygame.K_UP: UP,
+        pygame.K_DOWN: DOWN
+    }
+
+@functools.lru_cache(maxsize=256)
+def render_text(text, font, color):
+    # Text only changes when the values in it change, so rasterize each
+    # distinct string once and reuse the surface
+    return font.render(text, True, color)
 
 def display_score(score, level, lives):
-    score_text = font.render(f"Score: {score}  Level: {level}  Lives: {lives}", True, WHITE)
-    window.blit(score_text, [10, 10])
-
-def display_high_scores():
-    high_score_text = font.render("Top Scores:", True, WHITE)
-    window.blit(high_score_text, [width - 200, 10])
-    for i, score in enumerate(high_scores):
-        score_text = font.render(f"{i+1}. {score}", True, WHITE)
-        window.blit(score_text, [width - 200, 40 + i * 30])
-
-def update_high_scores(score):
-    global high_scores
-    high_scores.append(score)
-    high_scores.sort(reverse=True)
-    high_scores = high_scores[:3]
-    save_high_scores(high_scores)
-    logging.info(f"Updated high scores: {high_scores}")
-
-def draw_text_center(text, font, color, y_offset=0):
-    text_surface = font.render(text, True, color)
+    score_text = render_text(f"Score: {score}  Level: {level}  Lives: {lives}", app.font, WHITE)
+    return app.window.blit(score_text, [10, 10])
+
+def display_high_scores(surface=None):
+    surface = surface or app.window
+    surface.blit(render_text("Top Scores:", app.font, WHITE), [width - 200, 10])
+    for i, score in enumerate(app.high_scores):
+        surface.blit(render_text(f"{i+1}. {score}", app.font, WHITE), [width - 200, 40 + i * 30])
+
+def update_high_scores(score, seed=None, level=None, ticks=None, player=None):
+    """Record ``score`` and return the high score table before and after it was added.
+
+    ``player`` defaults to ``app.player``.  Bot games are stored but never
+    enter the table the game shows.
+    """
+    old_high_scores, app.high_scores = app.store.add(score, player or app.player, seed, level, ticks,
+                                                     exclude=bot_players)
+    logging.info(f"Updated high scores: {app.high_scores}")
+    return old_high_scores, app.high_scores
+
+def draw_text_center(text, font, color, y_offset=0, surface=None):
+    surface = surface or app.window
+    text_surface = render_text(text, font, color)
     text_rect = text_surface.get_rect()
     text_rect.center = (width // 2, height // 2 + y_offset)
-    window.blit(text_surface, text_rect)
+    surface.blit(text_surface, text_rect)
+
+@functools.lru_cache(maxsize=None)
+def game_over_background():
+    # The parts of the game over screen that never change, built once
+    surface = pygame.Surface((width, height))
+    surface.fill(BLACK)
+    draw_text_center("Game Over!", app.large_font, RED, -100, surface)
+    draw_text_center("Press R to Restart", app.font, WHITE, 50, surface)
+    draw_text_center("Press Q to Quit", app.font, WHITE, 100, surface)
+    return surface
+
+@functools.lru_cache(maxsize=None)
+def start_background():
+    # Gradient and instructions for the start screen, built once and blitted on each blink
+    surface = pygame.Surface((width, height))
+    for i in range(height):
+        color = (min(i // 3, 255), min(i // 2, 255), 100)
+        pygame.draw.line(surface, color, (0, i), (width, i))
+    draw_text_center("Snake Game", app.large_font, GREEN, -150, surface)
+    draw_text_center("Use arrow keys to control the snake", app.font, WHITE, -50, surface)
+    draw_text_center("Eat food to grow longer and increase score", app.font, WHITE, 0, surface)
+    return surface
 
 def game_over_screen(score):
-    pygame.mixer.Sound.play(game_over_sound)
-    window.fill(BLACK)
-    draw_text_center("Game Over!", large_font, RED, -100)
-    draw_text_center(f"Final Score: {score}", font, WHITE, -50)
-    draw_text_center("Press R to Restart", font, WHITE, 50)
-    draw_text_center("Press Q to Quit", font, WHITE, 100)
+    app.play_sound(game_over_sound)
+    app.window.blit(game_over_background(), (0, 0))
+    draw_text_center(f"Final Score: {score}", app.font, WHITE, -50)
     display_high_scores()
     pygame.display.update()
 
@@ -145,14 +222,9 @@ def start_screen():
     clock = pygame.time.Clock()
     waiting = True
     while waiting:
-        for i in range(height):
-            color = (min(i // 3, 255), min(i // 2, 255), 100)
-            pygame.draw.line(window, color, (0, i), (width, i))
-        draw_text_center("Snake Game", large_font, GREEN, -150)
-        draw_text_center("Use arrow keys to control the snake", font, WHITE, -50)
-        draw_text_center("Eat food to grow longer and increase score", font, WHITE, 0)
+        app.window.blit(start_background(), (0, 0))
         if blink:
-            draw_text_center("Press any key to start", font, start_text_color, 100)
+            draw_text_center("Press any key to start", app.font, start_text_color, 100)
         pygame.display.update()
         blink = not blink
         clock.tick(3)
@@ -167,205 +239,291 @@ def start_screen():
                     return True
 
 def pause_game(score, level, lives):
+    """Wait for P to resume; returns False if the window was closed instead."""
     paused = True
-    draw_text_center(f"Paused: Score: {score}  Level: {level}  Lives: {lives}", large_font, WHITE, 0)
+    draw_text_center(f"Paused: Score: {score}  Level: {level}  Lives: {lives}", app.large_font, WHITE, 0)
     pygame.display.update()
     while paused:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
+                return False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:
                     paused = False
-
-def game_loop():
-    global snake_speed, level, lives
-    game_over = False
-
-    # 初始化蛇的起始位置
-    x1 = width // 2
-    y1 = height // 2
-    x1_change = block_size
-    y1_change = 0
-
-    # 初始化蛇身
-    snake_list = []
-    snake_length = 1
-
-    # 初始化食物的位置
-    food_x = round(random.randrange(0, width - block_size) / block_size) * block_size
-    food_y = round(random.randrange(0, height - block_size) / block_size) * block_size
+    return True
+
+class BoardRenderer:
+    """Draws the board, repainting only what changed since the last frame.
+
+    The env records every cell whose contents change in ``env.dirty``; each
+    frame ``draw()`` repaints only those cells and, when needed, the HUD,
+    and returns the rects that ``present()`` hands to
+    ``pygame.display.update()``.  ``invalidate()`` forces the next frame to
+    repaint the whole window (after overlays like pause).
+
+    When the board is bigger than the window only a window-sized viewport is
+    drawn.  It wraps around the board's edges like the snake does, and jumps
+    to recentre on the head when the head gets within ``scroll_margin``
+    cells of its edge.  Everything it draws is looked up by viewport cell,
+    so a frame costs the same however big the board is.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.window = app.window
+        env.dirty = set()
+        self.hud = None
+        self.hud_rect = None
+        self.view_cols = min(env.cols, width // block_size)
+        self.view_rows = min(env.rows, height // block_size)
+        self.origin_x = 0  # Board cell shown at the top left of the view
+        self.origin_y = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def follow(self):
+        env = self.env
+        x, y = env.position(env.head)
+        if env.cols > self.view_cols and not (
+                scroll_margin <= (x - self.origin_x) % env.cols < self.view_cols - scroll_margin):
+            self.origin_x = (x - self.view_cols // 2) % env.cols
+            self.invalidate()
+        if env.rows > self.view_rows and not (
+                scroll_margin <= (y - self.origin_y) % env.rows < self.view_rows - scroll_margin):
+            self.origin_y = (y - self.view_rows // 2) % env.rows
+            self.invalidate()
+
+    def view_cell(self, x, y):
+        """The board cell shown at column ``x``, row ``y`` of the view, or None outside the board."""
+        env = self.env
+        if x >= self.view_cols or y >= self.view_rows:
+            return None
+        return ((self.origin_y + y) % env.rows) * env.cols + (self.origin_x + x) % env.cols
+
+    def cell_rect(self, cell):
+        """Where ``cell`` is drawn in the window, or None if it is outside the view."""
+        env = self.env
+        y, x = divmod(cell, env.cols)
+        x = (x - self.origin_x) % env.cols
+        y = (y - self.origin_y) % env.rows
+        if x >= self.view_cols or y >= self.view_rows:
+            return None
+        return [x * block_size, y * block_size, block_size, block_size]
+
+    def draw_cell(self, cell, color):
+        rect = self.cell_rect(cell)
+        if rect is None:
+            return None
+        return pygame.draw.rect(self.window, color, rect)
+
+    def cell_color(self, cell):
+        env = self.env
+        if env.occupied[cell]:
+            return GREEN
+        if env.special_food_active and cell == env.special_food_pos:
+            return special_food_types[env.special_food_type]["color"]
+        if cell == env.food:
+            return RED
+        if cell in env.obstacles:
+            return ORANGE
+        return BLACK
+
+    def draw_hud(self):
+        env = self.env
+        self.hud = (env.score, env.level, env.lives)
+        self.hud_rect = display_score(*self.hud)
+        return self.hud_rect
+
+    def draw(self):
+        env = self.env
+        self.follow()
+        if self.full_redraw:
+            self.window.fill(BLACK)
+
+            # 绘制障碍物
+            for obs in env.obstacles_in(self.origin_x, self.origin_y, self.view_cols, self.view_rows):
+                self.draw_cell(obs, ORANGE)
+
+            # 绘制普通食物和特殊食物
+            if env.food is not None:
+                self.draw_cell(env.food, RED)
+            if env.special_food_active:
+                self.draw_cell(env.special_food_pos, special_food_types[env.special_food_type]["color"])
+
+            # 绘制蛇: only the part in view, however long it is
+            occupied = env.occupied
+            for y in range(self.view_rows):
+                for x in range(self.view_cols):
+                    cell = self.view_cell(x, y)
+                    if occupied[cell]:
+                        self.draw_cell(cell, GREEN)
+            self.draw_hud()
+
+            env.dirty.clear()
+            self.full_redraw = False
+            return None
+
+        rects = []
+        for cell in env.dirty:
+            rect = self.draw_cell(cell, self.cell_color(cell))
+            if rect is not None:
+                rects.append(rect)
+        env.dirty.clear()
+
+        # 分数栏盖在棋盘上，文字变了或者下面的格子变了都要重画
+        hud_changed = (env.score, env.level, env.lives) != self.hud
+        if hud_changed or self.hud_rect.collidelist(rects) != -1:
+            old_rect = self.hud_rect
+            for y in range(old_rect.top // block_size, (old_rect.bottom - 1) // block_size + 1):
+                for x in range(old_rect.left // block_size, (old_rect.right - 1) // block_size + 1):
+                    cell = self.view_cell(x, y)
+                    color = BLACK if cell is None else self.cell_color(cell)
+                    pygame.draw.rect(self.window, color, [x * block_size, y * block_size, block_size, block_size])
+            rects.append(self.draw_hud().union(old_rect))
+        return rects
+
+    def present(self, rects):
+        """Show what ``draw()`` painted: the whole window if ``rects`` is None."""
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+
+def queue_turn(turns, env, direction):
+    # Only queue real turns relative to the last queued direction, so two
+    # quick presses between ticks become two turns instead of a reversal
+    last = turns[-1] if turns else env.direction
+    if len(turns) < max_queued_turns and (direction[0] != 0) != (last[0] != 0):
+        turns.append(direction)
+
+def game_loop(recording, autoplay=False, profiler=null_profiler):
+    env = recording.new_env()
+    renderer = BoardRenderer(env)
+    player = AutoPlayer(env) if autoplay else None
+    turns = deque()
 
     # 初始化时钟
     clock = pygame.time.Clock()
+    lag = 0.0  # Simulation time owed, in seconds
+
+    while not env.game_over:
+        # 控制游戏速度: run as many fixed ticks as the elapsed time calls for
+        lag += clock.tick(max_fps) / 1000
+        profiler.begin_frame()
 
-    # 初始化分数和障碍物
-    score = 0
-    special_food_active = False
-    special_food_time = 0
-    special_food_pos = None
-    special_food_type = None
-    obstacles = []  # 用于保存障碍物的位置列表
-
-    # 生成障碍物的函数
-    def generate_obstacles(level):
-        obstacles.clear()  # 先清空旧的障碍物列表
-        while len(obstacles) < level:
-            obs_x = round(random.randrange(0, width - block_size) / block_size) * block_size
-            obs_y = round(random.randrange(0, height - block_size) / block_size) * block_size
-            # 确保障碍物不与蛇和食物重叠
-            if [obs_x, obs_y] not in snake_list and [obs_x, obs_y] != [food_x, food_y]:
-                obstacles.append([obs_x, obs_y])
-
-    generate_obstacles(level)  # 初始生成障碍物
-
-    while not game_over:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                recording.finish(env)
                 return False
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT and x1_change == 0:
-                    x1_change = -block_size
-                    y1_change = 0
-                elif event.key == pygame.K_RIGHT and x1_change == 0:
-                    x1_change = block_size
-                    y1_change = 0
-                elif event.key == pygame.K_UP and y1_change == 0:
-                    y1_change = -block_size
-                    x1_change = 0
-                elif event.key == pygame.K_DOWN and y1_change == 0:
-                    y1_change = block_size
-                    x1_change = 0
+                if event.key in key_directions() and not player:
+                    queue_turn(turns, env, key_directions()[event.key])
                 elif event.key == pygame.K_p:  # 暂停功能
-                    pause_game(score, level, lives)
-
-        # 更新蛇的坐标
-        x1 += x1_change
-        y1 += y1_change
-
-        # 碰撞检测逻辑：蛇如果超出边界，直接从另一侧出现
-        if x1 >= width:
-            x1 = 0
-        elif x1 < 0:
-            x1 = width - block_size
-        if y1 >= height:
-            y1 = 0
-        elif y1 < 0:
-            y1 = height - block_size
-
-        # 绘制背景
-        window.fill(BLACK)
-
-        # 绘制障碍物
-        for obs in obstacles:
-            pygame.draw.rect(window, (255, 165, 0), [obs[0], obs[1], block_size, block_size])
-
-        # 检查是否撞到障碍物
-        if [x1, y1] in obstacles:
-            lives -= 1
-            if lives == 0:
-                update_high_scores(score)
-                game_over = True
+                    recording.record(env.tick, "pause")
+                    if not pause_game(env.score, env.level, env.lives):
+                        recording.finish(env)
+                        return False
+                    renderer.invalidate()
+                    clock.tick()  # Don't count the pause as game time
+                    profiler.begin_frame()
+        profiler.mark("input")
+
+        ticks = 0
+        while lag >= 1 / env.snake_speed and not env.game_over:
+            lag -= 1 / env.snake_speed
+            if player:
+                direction = player.choose()
             else:
-                # 重新设置蛇的位置并重置部分状态
-                x1 = width // 2
-                y1 = height // 2
-                snake_list = []
-                snake_length = 1
-                snake_speed = initial_speed
-                generate_obstacles(level)  # 重新生成障碍物
-
-        # 特殊食物生成逻辑
-        if not special_food_active and random.randint(1, 100) > 98:
-            special_food_type = random.choice(list(special_food_types.keys()))
-            special_food_pos = [round(random.randrange(0, width - block_size) / block_size) * block_size,
-                                round(random.randrange(0, height - block_size) / block_size) * block_size]
-            special_food_time = time.time()
-            special_food_active = True
-
-        # 绘制普通食物
-        draw_food([food_x, food_y])
-
-        # 绘制特殊食物
-        if special_food_active:
-            draw_food(special_food_pos, special_food_type)
-            # 如果特殊食物的存在时间超过设定时长，则将其移除
-            if time.time() - special_food_time > special_food_duration:
-                special_food_active = False
-
-        # 更新蛇的身体
-        snake_head = [x1, y1]
-        snake_list.append(snake_head)
-
-        if len(snake_list) > snake_length:
-            del snake_list[0]
-
-        # 检查蛇是否撞到自己
-        for segment in snake_list[:-1]:
-            if segment == snake_head:
-                lives -= 1
-                if lives == 0:
-                    update_high_scores(score)
-                    game_over = True
-
-        # 绘制蛇
-        draw_snake(snake_list)
-        display_score(score, level, lives)
-
-        pygame.display.update()
-
-        # 检查是否吃到普通食物
-        if x1 == food_x and y1 == food_y:
-            pygame.mixer.Sound.play(eat_sound)
-            food_x = round(random.randrange(0, width - block_size) / block_size) * block_size
-            food_y = round(random.randrange(0, height - block_size) / block_size) * block_size
-            snake_length += 1
-            score += 1
-            snake_speed += 1
-
-            # 每5分增加一次等级，增加障碍物
-            if score % 5 == 0:
-                level += 1
-                generate_obstacles(level)  # 每增加等级都生成新的障碍物
-                snake_speed += 2
-
-        # 检查是否吃到特殊食物
-        if special_food_active and x1 == special_food_pos[0] and y1 == special_food_pos[1]:
-            pygame.mixer.Sound.play(eat_sound)
-            if special_food_type == "speed_up":
-                snake_speed += 5  # 提高蛇的速度
-            elif special_food_type == "slow_down":
-                snake_speed = max(snake_speed - 5, 5)  # 减慢蛇的速度，但不会低于5
-            elif special_food_type == "add_life":
-                lives += 1  # 增加一条生命
-            elif special_food_type == "remove_life":
-                lives -= 1  # 减少一条生命
-            special_food_active = False  # 吃完特殊食物后移除
-
-        # 控制游戏速度
-        clock.tick(snake_speed)
-
-    return game_over_screen(score)
+                direction = turns.popleft() if turns else None
+            recording.record_step(env, direction)
+            events = env.step(direction)
+            profiler.count(events)
+            if "food" in events or "special_food" in events:
+                app.play_sound(eat_sound)
+            ticks += 1
+            if ticks == max_ticks_per_frame:
+                lag = 0.0
+                break
+        profiler.mark("update")
+
+        rects = renderer.draw()
+        profiler.mark("render")
+        renderer.present(rects)
+        profiler.mark("present")
+        profiler.end_frame()
+
+    if autoplay:
+        # 机器人的分数单独记录，不挤掉玩家的高分
+        update_high_scores(env.score, recording.seed, env.level, env.tick, player="autoplay")
+        recording.finish(env)
+    else:
+        # Both tables come from the database, so scores other instances recorded meanwhile are included
+        old_high_scores, new_high_scores = update_high_scores(env.score, recording.seed, env.level, env.tick)
+        recording.finish(env, old_high_scores, new_high_scores)
+    return game_over_screen(env.score)
 
 # Start the game
 def main():
+    parser = argparse.ArgumentParser(description="Snake Game")
+    parser.add_argument("--seed", type=int, help="play every game with this random seed")
+    parser.add_argument("--record", metavar="DIR", help="save a replay of each game to DIR/<seed>-<session start>-<game>.json")
+    parser.add_argument("--autoplay", action="store_true", help="let the built-in agent steer the snake")
+    parser.add_argument("--headless", action="store_true",
+                        help="with --autoplay, play without a window as fast as possible and print results")
+    parser.add_argument("--games", type=int, default=1, help="number of headless games to play")
+    parser.add_argument("--max-ticks", type=int, help="stop each headless game after this many ticks")
+    parser.add_argument("--mute", action="store_true", help="play without sound")
+    parser.add_argument("--player", help="name to record high scores under")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write per-phase frame timings and event counts to PATH as JSON lines")
+    parser.add_argument("--grid", type=parse_grid, metavar="COLSxROWS",
+                        help="board size in cells (default: fills the window); bigger boards scroll")
+    args = parser.parse_args()
+    if args.headless and not args.autoplay:
+        parser.error("--headless needs --autoplay")
+
+    board_width, board_height = width, height
+    if args.grid:
+        board_width, board_height = args.grid[0] * block_size, args.grid[1] * block_size
+
+    # Set up logging, written from a background thread
+    start_logging('snake_game.log')
+
+    if args.headless:
+        for i, result in enumerate(benchmark(args.games, args.seed, args.max_ticks, board_width, board_height, block_size)):
+            logging.info(f"Autoplay game {i + 1}: {result}")
+            print(f"game {i + 1}: score {result['score']}, level {result['level']}, length {result['length']}, "
+                  f"{result['ticks']} ticks, {result['ticks_per_second']:.0f} ticks/s")
+        return
+
+    global app
+    app = App(audio=not args.mute, player=args.player)
+    app.play_music(background_music)
+
     logging.info("Game started")
     if not start_screen():
         return
 
+    profiler = FrameProfiler(args.profile, budget=1 / max_fps) if args.profile else null_profiler
+    # With --seed every game has the same seed, so the session start and game number keep file names apart
+    session = time.strftime("%Y%m%d-%H%M%S")
+    game = 0
     while True:
-        global snake_speed, level, lives
-        snake_speed = initial_speed
-        level = 1
-        lives = 3
-        result = game_loop()
+        game += 1
+        recording = Recording(args.seed, board_width, board_height, block_size)
+        result = game_loop(recording, args.autoplay, profiler)
+        if args.record:
+            os.makedirs(args.record, exist_ok=True)
+            recording.save(os.path.join(args.record, f"{recording.seed}-{session}-{game}.json"))
         if result is False:
             break
         elif result is True:
             continue
 
     logging.info("Game ended")
+    profiler.close()
     pygame.quit()
 
 if __name__ == "__main__":
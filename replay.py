@@ -0,0 +1,140 @@
+"""Record games as a seed plus per-tick inputs, and replay them headless.
+
+All of a game's randomness comes from the seeded ``random.Random`` inside
+``SnakeEnv`` and special food expires after a number of ticks, so the seed
+and the input applied on each tick are enough to reproduce a game exactly.
+Replays run without pygame as fast as the env can step.
+
+Usage:
+    python replay.py recording.json [recording.json ...]
+
+Each recording is replayed and checked against the final score, tick count
+and high score update it was saved with.  The exit status is 1 if any of
+them does not match.
+"""
+import argparse
+import json
+import random
+import sys
+
+from snake_env import SnakeEnv, width, height, block_size, LEFT, RIGHT, UP, DOWN
+from scores import add_score
+
+input_names = {LEFT: "left", RIGHT: "right", UP: "up", DOWN: "down"}
+name_directions = {name: direction for direction, name in input_names.items()}
+
+
+class Recording:
+    """A seed and the inputs applied on each tick of one game.
+
+    ``inputs`` is a list of ``[tick, name]`` pairs, where ``tick`` is the
+    number of ticks completed when the input was applied and ``name`` is a
+    direction from ``input_names`` or ``"pause"``.  Pauses are kept for the
+    record only; they do not affect the simulation.
+    """
+
+    def __init__(self, seed=None, width=width, height=height, block_size=block_size):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.block_size = block_size
+        self.inputs = []
+        self.ticks = 0
+        self.score = None
+        self.high_scores = None
+        self.new_high_scores = None
+
+    def new_env(self):
+        return SnakeEnv(self.width, self.height, self.block_size, seed=self.seed)
+
+    def record(self, tick, name):
+        self.inputs.append([tick, name])
+
+    def record_step(self, env, direction):
+        """Record ``direction`` as the input for ``env``'s next step.
+
+        Directions along the snake's current axis are no-ops for the env and
+        are left out, which keeps autoplay recordings small.
+        """
+        if direction is not None and (direction[0] != 0) != (env.direction[0] != 0):
+            self.inputs.append([env.tick, input_names[direction]])
+
+    def finish(self, env, high_scores=None, new_high_scores=None):
+        """Store the outcome: final score, tick count and the high score table before and after."""
+        self.ticks = env.tick
+        self.score = env.score
+        self.high_scores = high_scores
+        self.new_high_scores = new_high_scores
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "width": self.width,
+            "height": self.height,
+            "block_size": self.block_size,
+            "inputs": self.inputs,
+            "ticks": self.ticks,
+            "score": self.score,
+            "high_scores": self.high_scores,
+            "new_high_scores": self.new_high_scores,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        recording = cls(data["seed"], data["width"], data["height"], data["block_size"])
+        recording.inputs = data["inputs"]
+        recording.ticks = data["ticks"]
+        recording.score = data["score"]
+        recording.high_scores = data.get("high_scores")
+        recording.new_high_scores = data.get("new_high_scores")
+        return recording
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def replay(recording):
+    """Replay ``recording`` headless and return the env in its final state."""
+    env = recording.new_env()
+    directions = {tick: name_directions[name] for tick, name in recording.inputs if name in name_directions}
+    while env.tick < recording.ticks and not env.game_over:
+        env.step(directions.get(env.tick))
+    return env
+
+def verify(recording):
+    """Replay ``recording`` and return ``(ok, env)``.
+
+    ``ok`` is True when the replay reaches the recorded tick count and score,
+    and, if the recording includes a high score update, the same new table.
+    """
+    env = replay(recording)
+    ok = env.tick == recording.ticks and env.score == recording.score
+    if recording.new_high_scores is not None:
+        ok = ok and env.game_over and add_score(recording.high_scores, env.score) == recording.new_high_scores
+    return ok, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded snake games and check their results.")
+    parser.add_argument("recordings", nargs="+", help="recording JSON files")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.recordings:
+        recording = Recording.load(path)
+        ok, env = verify(recording)
+        failed += not ok
+        status = "ok" if ok else f"MISMATCH (recorded score {recording.score}, {recording.ticks} ticks)"
+        print(f"{path}: score {env.score}, level {env.level}, {env.tick} ticks: {status}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""High score table, kept in an SQLite database.
+
+Every finished game is stored as its own row (score, player, seed, level,
+ticks), with indexes for top-N queries overall, per player and per seed.
+The database runs in WAL mode with a busy timeout, so several game
+instances and tournament runs can record scores at the same time without
+corrupting the file or losing each other's updates.  The game's own store
+imports the scores from the old high_scores.json file when the database is
+first created.
+
+This module has no pygame dependency so replays and tools can use it
+without opening a window.
+"""
+import json
+import os
+import logging
+import sqlite3
+import time
+
+# High scores files
+high_scores_file = "high_scores.json"  # Old JSON table, imported once
+scores_db_file = "high_scores.db"
+high_scores_kept = 3  # How many scores the game shows
+bot_players = ("autoplay", "random")  # Players bot games are recorded under, left out of the game's table
+
+
+def load_high_scores(path=high_scores_file):
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+        return [0] * high_scores_kept
+    except Exception as e:
+        logging.error(f"Error loading high scores: {e}")
+        return [0] * high_scores_kept
+
+def add_score(high_scores, score):
+    """Return the high score table after ``score`` is added to ``high_scores``."""
+    return sorted(high_scores + [score], reverse=True)[:high_scores_kept]
+
+
+class ScoreStore:
+    """Leaderboard backed by SQLite.
+
+    Each ``add`` or ``add_many`` call is one transaction.  Use ``add_many``
+    to record a batch of results with a single write.  ``import_json`` names
+    an old JSON high score table to copy in once, when the database is new.
+    """
+
+    columns = ("score", "player", "seed", "level", "ticks")
+
+    def __init__(self, path=scores_db_file, timeout=30.0, import_json=None):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    id INTEGER PRIMARY KEY,
+                    score INTEGER NOT NULL,
+                    player TEXT,
+                    seed INTEGER,
+                    level INTEGER,
+                    ticks INTEGER,
+                    created REAL NOT NULL
+                )""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_seed ON scores (seed, score DESC)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # Import the old JSON table once; only the process whose marker insert wins does it
+            if import_json is not None:
+                marker = self.connection.execute("INSERT OR IGNORE INTO meta VALUES ('json_imported', '1')")
+                if marker.rowcount:
+                    self._insert([{"score": score} for score in load_high_scores(import_json) if score > 0])
+
+    def _insert(self, results):
+        now = time.time()
+        self.connection.executemany(
+            "INSERT INTO scores (score, player, seed, level, ticks, created) VALUES (?, ?, ?, ?, ?, ?)",
+            [tuple(result.get(column) for column in self.columns) + (now,) for result in results])
+
+    def add(self, score, player=None, seed=None, level=None, ticks=None, n=high_scores_kept, exclude=()):
+        """Record one result and return the top ``n`` scores before and after it.
+
+        Both tables are read inside the same write transaction as the insert,
+        so a score recorded by another process at the same time lands wholly
+        before or after this one and never between the two reads.  They leave
+        out the players in ``exclude``, as ``top()`` does.
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.high_scores(n, exclude)
+            self._insert([{"score": score, "player": player, "seed": seed, "level": level, "ticks": ticks}])
+            after = self.high_scores(n, exclude)
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+        return before, after
+
+    def add_many(self, results):
+        """Record many results in one transaction.
+
+        ``results`` are dicts with a ``score`` key and optional ``player``,
+        ``seed``, ``level`` and ``ticks`` keys; other keys are ignored.
+        """
+        with self.connection:
+            self._insert(results)
+
+    def top(self, n=high_scores_kept, player=None, seed=None, exclude=()):
+        """Return the ``n`` best results, best first, as dicts.
+
+        ``player`` and ``seed`` restrict the query to one player or one seed;
+        results recorded under a player in ``exclude`` are left out.
+        """
+        query = "SELECT score, player, seed, level, ticks, created FROM scores"
+        conditions = []
+        params = []
+        if player is not None:
+            conditions.append("player = ?")
+            params.append(player)
+        if seed is not None:
+            conditions.append("seed = ?")
+            params.append(seed)
+        if exclude:
+            conditions.append(f"(player IS NULL OR player NOT IN ({', '.join('?' * len(exclude))}))")
+            params.extend(exclude)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY score DESC, id LIMIT ?"
+        params.append(n)
+        rows = self.connection.execute(query, params).fetchall()
+        return [dict(zip(self.columns + ("created",), row)) for row in rows]
+
+    def high_scores(self, n=high_scores_kept, exclude=()):
+        """The top ``n`` scores as plain ints, padded with zeros like the old table."""
+        scores = [row["score"] for row in self.top(n, exclude=exclude)]
+        return scores + [0] * (n - len(scores))
+
+    def close(self):
+        self.connection.close()
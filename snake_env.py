@@ -0,0 +1,336 @@
+"""Headless snake rules engine.
+
+This module holds the game rules that used to live inside ``game_loop()``:
+boundary wrapping, obstacles, normal and special food, lives and level-ups.
+It never imports pygame and never looks at the wall clock, so a game can be
+stepped as fast as Python allows.  ``greedy_snack.py`` drives it for the
+windowed game; bots, balancing scripts and tests can drive it directly.
+
+Positions are board cells packed into one int, ``y * cols + x``; use
+``SnakeEnv.position()`` to unpack them.  The snake body is a deque of cells
+backed by a per-cell occupancy count, so moving and collision checks cost
+the same however long the snake gets.  Empty cells are kept in a free-cell
+index that is updated as the snake moves, so food, special food and
+obstacles are placed with a single uniform draw over truly empty cells.
+
+Boards can be far larger than the window (thousands of cells a side).  On
+those the free-cell index is only built once random draws stop finding
+empty cells quickly, and obstacles are also filed by ``obstacle_chunk``
+square chunks so a viewport can look up just the ones it shows.  Memory is
+then one byte per cell plus what is on the board, and a tick costs the same
+whatever the board size.
+"""
+import random
+from collections import deque
+
+# Board properties (same defaults as the pygame window)
+width = 800
+height = 600
+block_size = 20
+
+initial_speed = 8
+initial_lives = 3
+level_up_score = 5  # 每5分升一级
+
+# Special food types
+special_food_types = {
+    "speed_up": {"color": (255, 255, 0), "effect": "speed_up"},
+    "slow_down": {"color": (0, 0, 255), "effect": "slow_down"},
+    "add_life": {"color": (0, 255, 255), "effect": "add_life"},
+    "remove_life": {"color": (128, 0, 128), "effect": "remove_life"}
+}
+
+# Big boards
+free_index_cells = 1 << 16  # Boards up to this many cells keep a free-cell index from the start
+spawn_attempts = 32  # Random draws for an empty cell before building the free-cell index
+obstacle_chunk = 32  # Side of the square chunks obstacles are filed under, in cells
+
+special_food_chance = 2  # Percent chance per tick of spawning special food
+special_food_duration = 8  # How long the special food stays, in seconds at the current speed
+
+# Directions, in cells per tick
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+UP = (0, -1)
+DOWN = (0, 1)
+
+
+def parse_grid(text):
+    """Parse a ``COLSxROWS`` board size such as ``4000x3000``, for ``--grid`` options."""
+    cols, _, rows = text.lower().partition("x")
+    cols, rows = int(cols), int(rows)
+    if cols < 1 or rows < 1:
+        raise ValueError(f"bad grid size: {text}")
+    return cols, rows
+
+
+class SnakeEnv:
+    """One game of snake, advanced one tick per ``step()`` call.
+
+    ``step()`` returns the list of events that happened during the tick:
+    ``"food"``, ``"special_food"``, ``"level_up"``, ``"obstacle"`` and
+    ``"self"`` (the last two are the causes of a lost life),
+    ``"special_spawn"`` when special food appears, and ``"board_full"`` when
+    there was no empty cell left to put food on.
+
+    Set ``dirty`` to an empty set to have every cell whose contents change
+    added to it; renderers use this to repaint only those cells.
+    """
+
+    def __init__(self, width=width, height=height, block_size=block_size, seed=None,
+                 level=1, speed=initial_speed):
+        self.start_level = level
+        self.start_speed = speed
+        self.cols = width // block_size
+        self.rows = height // block_size
+        self.cells = self.cols * self.rows
+        self.center = (self.rows // 2) * self.cols + self.cols // 2
+        self.rng = random.Random(seed)
+        self.dirty = None
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+
+        self.snake_speed = self.start_speed
+        self.level = self.start_level
+        self.lives = initial_lives
+        self.score = 0
+        self.tick = 0
+        self.game_over = False
+
+        # 初始化蛇的起始位置
+        self.direction = RIGHT
+        self.head = self.center
+        self.snake = deque()
+        self.occupied = bytearray(self.cells)  # 每个格子上蛇身的节数
+        self.snake_length = 1
+
+        # Free-cell index: ``free`` lists every empty cell and ``free_index``
+        # maps a cell to its slot in ``free`` (-1 when the cell is taken).
+        # Both are None on big boards until ``spawn_cell()`` needs them.
+        if self.cells <= free_index_cells:
+            self.free = list(range(self.cells))
+            self.free_index = list(range(self.cells))
+        else:
+            self.free = None
+            self.free_index = None
+
+        self.food = None
+        self.special_food_active = False
+        self.special_food_pos = None
+        self.special_food_type = None
+        self.special_food_tick = 0
+        self.special_food_ticks = 0
+
+        self.obstacles = set()
+        self.obstacle_chunks = {}  # (chunk x, chunk y) -> obstacle cells in that chunk
+        self.food = self.spawn_cell()
+        self.generate_obstacles()
+
+    def position(self, cell):
+        """Unpack a cell index into ``(x, y)``."""
+        y, x = divmod(cell, self.cols)
+        return x, y
+
+    def is_empty(self, cell):
+        return (not self.occupied[cell] and cell not in self.obstacles and cell != self.food
+                and not (self.special_food_active and cell == self.special_food_pos))
+
+    def take_cell(self, cell):
+        """Remove ``cell`` from the free-cell index (swap-remove)."""
+        if self.dirty is not None:
+            self.dirty.add(cell)
+        if self.free_index is None:
+            return
+        i = self.free_index[cell]
+        if i < 0:
+            return
+        last = self.free.pop()
+        if last != cell:
+            self.free[i] = last
+            self.free_index[last] = i
+        self.free_index[cell] = -1
+
+    def release_cell(self, cell):
+        """Put ``cell`` back in the free-cell index if nothing is on it any more."""
+        if self.dirty is not None:
+            self.dirty.add(cell)
+        if self.free_index is not None and self.free_index[cell] < 0 and self.is_empty(cell):
+            self.free_index[cell] = len(self.free)
+            self.free.append(cell)
+
+    def build_free_index(self):
+        self.free = [cell for cell in range(self.cells) if self.is_empty(cell)]
+        self.free_index = [-1] * self.cells
+        for i, cell in enumerate(self.free):
+            self.free_index[cell] = i
+
+    def spawn_cell(self):
+        """Take a uniformly random empty cell, or return None if the board is full."""
+        if self.free is None:
+            # 大棋盘上几乎都是空格子，随机抽几次就能抽到
+            for _ in range(spawn_attempts):
+                cell = self.rng.randrange(self.cells)
+                if self.is_empty(cell):
+                    self.take_cell(cell)
+                    return cell
+            self.build_free_index()
+        if not self.free:
+            return None
+        cell = self.free[self.rng.randrange(len(self.free))]
+        self.take_cell(cell)
+        return cell
+
+    def generate_obstacles(self):
+        # 先清空旧的障碍物
+        old = list(self.obstacles)
+        self.obstacles.clear()
+        self.obstacle_chunks.clear()
+        for cell in old:
+            self.release_cell(cell)
+        # 障碍物只放在空格子上，不与蛇和食物重叠
+        while len(self.obstacles) < self.level:
+            cell = self.spawn_cell()
+            if cell is None:
+                break
+            self.obstacles.add(cell)
+            x, y = self.position(cell)
+            self.obstacle_chunks.setdefault((x // obstacle_chunk, y // obstacle_chunk), set()).add(cell)
+
+    def obstacles_in(self, x, y, w, h):
+        """Obstacle cells in the ``w`` by ``h`` cells starting at cell ``(x, y)``, wrapping at the edges."""
+        found = []
+        for cy in self.chunk_span(y, h, self.rows):
+            for cx in self.chunk_span(x, w, self.cols):
+                for cell in self.obstacle_chunks.get((cx, cy), ()):
+                    ox, oy = self.position(cell)
+                    if (ox - x) % self.cols < w and (oy - y) % self.rows < h:
+                        found.append(cell)
+        return found
+
+    @staticmethod
+    def chunk_span(start, length, size):
+        """Chunk numbers covering ``length`` cells from ``start`` along a wrapping axis of ``size`` cells."""
+        if length >= size:
+            return range((size - 1) // obstacle_chunk + 1)
+        end = start + length - 1
+        if end < size:
+            return range(start // obstacle_chunk, end // obstacle_chunk + 1)
+        # Past the edge the span carries on from column / row 0; the two parts can share a chunk
+        return {*range(start // obstacle_chunk, (size - 1) // obstacle_chunk + 1),
+                *range((end - size) // obstacle_chunk + 1)}
+
+    def clear_snake(self):
+        cells = list(self.snake)
+        self.snake.clear()
+        for cell in cells:
+            self.occupied[cell] = 0
+            self.release_cell(cell)
+
+    def turn(self, direction):
+        """Change direction, ignoring turns back onto the snake's own axis."""
+        if direction[0] != 0 and self.direction[0] == 0:
+            self.direction = direction
+        elif direction[1] != 0 and self.direction[1] == 0:
+            self.direction = direction
+
+    def lose_life(self):
+        self.lives -= 1
+        if self.lives <= 0:
+            self.game_over = True
+
+    def step(self, action=None):
+        if self.game_over:
+            return []
+        if action is not None:
+            self.turn(action)
+
+        events = []
+        self.tick += 1
+
+        # 更新蛇的坐标，超出边界时从另一侧出现
+        y, x = divmod(self.head, self.cols)
+        self.head = ((y + self.direction[1]) % self.rows) * self.cols + (x + self.direction[0]) % self.cols
+
+        # 检查是否撞到障碍物
+        if self.head in self.obstacles:
+            events.append("obstacle")
+            self.lose_life()
+            if self.game_over:
+                return events
+            # 重新设置蛇的位置并重置部分状态
+            self.head = self.center
+            self.clear_snake()
+            self.snake_length = 1
+            self.snake_speed = self.start_speed
+            self.generate_obstacles()
+
+        # 特殊食物生成逻辑
+        if not self.special_food_active and self.rng.randint(1, 100) > 100 - special_food_chance:
+            self.special_food_type = self.rng.choice(list(special_food_types.keys()))
+            self.special_food_pos = self.spawn_cell()
+            self.special_food_tick = self.tick
+            self.special_food_ticks = special_food_duration * self.snake_speed
+            self.special_food_active = self.special_food_pos is not None
+            if self.special_food_active:
+                events.append("special_spawn")
+
+        # 如果特殊食物的存在时间超过设定时长，则将其移除
+        if self.special_food_active and self.tick - self.special_food_tick > self.special_food_ticks:
+            self.special_food_active = False
+            self.release_cell(self.special_food_pos)
+
+        # 更新蛇的身体
+        self.snake.append(self.head)
+        self.occupied[self.head] += 1
+        self.take_cell(self.head)
+        if len(self.snake) > self.snake_length:
+            tail = self.snake.popleft()
+            self.occupied[tail] -= 1
+            self.release_cell(tail)
+
+        # 检查蛇是否撞到自己
+        if self.occupied[self.head] > 1:
+            events.append("self")
+            self.lose_life()
+            if self.game_over:
+                return events
+
+        # 检查是否吃到普通食物
+        if self.head == self.food:
+            events.append("food")
+            self.food = self.spawn_cell()
+            self.snake_length += 1
+            self.score += 1
+            self.snake_speed += 1
+
+            # 每5分增加一次等级，增加障碍物
+            if self.score % level_up_score == 0:
+                events.append("level_up")
+                self.level += 1
+                self.generate_obstacles()
+                self.snake_speed += 2
+
+        # 检查是否吃到特殊食物
+        if self.special_food_active and self.head == self.special_food_pos:
+            events.append("special_food")
+            effect = special_food_types[self.special_food_type]["effect"]
+            if effect == "speed_up":
+                self.snake_speed += 5  # 提高蛇的速度
+            elif effect == "slow_down":
+                self.snake_speed = max(self.snake_speed - 5, 5)  # 减慢蛇的速度，但不会低于5
+            elif effect == "add_life":
+                self.lives += 1  # 增加一条生命
+            elif effect == "remove_life":
+                self.lose_life()  # 减少一条生命
+            self.special_food_active = False  # 吃完特殊食物后移除
+
+        # 棋盘满了就没有地方放食物，等有空格子再放
+        if self.food is None:
+            self.food = self.spawn_cell()
+            if self.food is None:
+                events.append("board_full")
+
+        return events
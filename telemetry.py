@@ -0,0 +1,171 @@
+"""Opt-in frame profiler and background log writing.
+
+``FrameProfiler`` times each frame's input, update, render and present
+phases, counts game events, and every few seconds writes one JSON line
+with frame time percentiles, dropped frames and counters.  Lines go through
+a ``QueueHandler``, so the game thread only puts a record on a queue and a
+``QueueListener`` thread does the file I/O.  ``start_logging()`` sets up the
+game's normal log the same way.
+
+When profiling is off the game uses ``null_profiler``, whose methods do
+nothing.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import math
+import queue
+import time
+
+phases = ("input", "update", "render", "present")
+
+
+def start_logging(filename, level=logging.DEBUG, logger=None, fmt=logging.BASIC_FORMAT):
+    """Send ``logger`` (the root logger by default) to ``filename`` from a background thread.
+
+    Returns the started ``QueueListener``; it is also stopped at exit.
+    """
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter(fmt))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logger or logging.getLogger()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    return listener
+
+
+class Histogram:
+    """Durations bucketed on a log scale, four buckets per doubling.
+
+    Recording is O(1) and memory is fixed however many samples arrive;
+    percentiles are accurate to within one bucket (about 19%).
+    """
+
+    buckets = 120  # 1 us up to about 1000 s
+
+    def __init__(self):
+        self.counts = [0] * self.buckets
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        index = int(4 * math.log2(us)) if us > 1 else 0
+        self.counts[min(index, self.buckets - 1)] += 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the ``p``-th percentile, in milliseconds."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(p / 100 * self.total)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(2 ** ((index + 1) / 4) / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        return {"p50": round(self.percentile(50), 3), "p99": round(self.percentile(99), 3),
+                "max": round(self.max * 1000, 3)}
+
+
+class NullProfiler:
+    """Stands in for FrameProfiler when profiling is off."""
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def count(self, events):
+        pass
+
+    def close(self):
+        pass
+
+null_profiler = NullProfiler()
+
+
+class FrameProfiler:
+    """Per-phase frame timings and event counters, written as JSON lines.
+
+    A frame is ``begin_frame()``, one ``mark(phase)`` at the end of each of
+    ``phases``, then ``end_frame()``.  Frame time is the work done between
+    ``begin_frame()`` and the last mark, not the time spent waiting for the
+    next frame, and a frame is counted as dropped when that work takes longer
+    than ``budget`` seconds.  A summary line is written every ``interval``
+    seconds and on ``close()``.
+    """
+
+    def __init__(self, path, budget=1 / 60, interval=5.0):
+        self.budget = budget
+        self.interval = interval
+        self.logger = logging.getLogger(f"snake.telemetry.{id(self)}")
+        self.logger.propagate = False
+        self.listener = start_logging(path, logging.INFO, self.logger, "%(message)s")
+        self.reset()
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def reset(self):
+        self.interval_start = time.perf_counter()
+        self.frames = 0
+        self.dropped = 0
+        self.frame_times = Histogram()
+        self.phase_times = {phase: Histogram() for phase in phases}
+        self.counters = {}
+
+    def begin_frame(self):
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phase_times[phase].record(now - self.last_mark)
+        self.last_mark = now
+
+    def end_frame(self):
+        frame_time = self.last_mark - self.frame_start
+        self.frame_times.record(frame_time)
+        self.frames += 1
+        if frame_time > self.budget:
+            self.dropped += 1
+        if self.last_mark - self.interval_start >= self.interval:
+            self.flush()
+
+    def count(self, events):
+        counters = self.counters
+        counters["ticks"] = counters.get("ticks", 0) + 1
+        for event in events:
+            counters[event] = counters.get(event, 0) + 1
+
+    def flush(self):
+        if self.frames or self.counters:
+            self.logger.info(json.dumps({
+                "time": time.time(),
+                "seconds": round(time.perf_counter() - self.interval_start, 3),
+                "frames": self.frames,
+                "dropped": self.dropped,
+                "frame_ms": self.frame_times.summary(),
+                "phase_ms": {phase: histogram.summary() for phase, histogram in self.phase_times.items()},
+                "counters": self.counters,
+            }))
+        self.reset()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.listener.stop)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.logger.handlers.clear()
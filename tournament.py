@@ -0,0 +1,173 @@
+"""Play many headless games across a process pool and summarize them.
+
+Every game gets its own seed (``--seed`` plus the game number), so a run can
+be repeated exactly and any single game can be replayed on its own.  Games
+are handed to workers in chunks; each worker reports its own tick rate.
+
+Usage:
+    python tournament.py --games 100000 --agent autoplay --max-ticks 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from snake_env import SnakeEnv, width, height, block_size, initial_speed, parse_grid, LEFT, RIGHT, UP, DOWN
+from autoplay import AutoPlayer
+from scores import ScoreStore
+
+
+def autoplay_agent(env, seed):
+    return AutoPlayer(env).choose
+
+def random_agent(env, seed):
+    rng = random.Random(seed)
+    choices = [None, None, None, LEFT, RIGHT, UP, DOWN]
+    return lambda: rng.choice(choices)
+
+# --scores records games under the agent's name; scores.bot_players lists
+# these names so the game's own high score table leaves them out
+agents = {
+    "autoplay": autoplay_agent,
+    "random": random_agent,
+}
+
+
+def play_game(seed, agent="autoplay", level=1, speed=initial_speed, max_ticks=None,
+              width=width, height=height, block_size=block_size):
+    """Play one headless game and return its result as a dict."""
+    env = SnakeEnv(width, height, block_size, seed=seed, level=level, speed=speed)
+    choose = agents[agent](env, seed)
+    lives_lost = Counter()
+    while not env.game_over and (max_ticks is None or env.tick < max_ticks):
+        for event in env.step(choose()):
+            if event == "obstacle" or event == "self":
+                lives_lost[event] += 1
+            elif event == "special_food" and env.special_food_type == "remove_life":
+                lives_lost["remove_life"] += 1
+    return {
+        "seed": seed,
+        "score": env.score,
+        "level": env.level,
+        "ticks": env.tick,
+        "finished": env.game_over,
+        "lives_lost": dict(lives_lost),
+    }
+
+def play_chunk(seeds, **settings):
+    """Worker entry point: play the games for ``seeds`` and time them."""
+    start = time.perf_counter()
+    results = [play_game(seed, **settings) for seed in seeds]
+    return os.getpid(), time.perf_counter() - start, results
+
+
+def run(games, seed=0, workers=None, chunk_size=None, **settings):
+    """Play ``games`` games across ``workers`` processes.
+
+    Returns ``(results, worker_stats)``: one result dict per game in seed
+    order, and per worker pid the games, ticks and seconds it spent.
+    """
+    workers = workers or os.cpu_count()
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool busy when game lengths vary
+        chunk_size = max(1, min(1000, games // (workers * 4) or 1))
+    seeds = range(seed, seed + games)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, games, chunk_size)]
+
+    results = []
+    worker_stats = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, list(chunk), **settings) for chunk in chunks]
+        for future in futures:
+            pid, elapsed, chunk_results = future.result()
+            results.extend(chunk_results)
+            stats = worker_stats.setdefault(pid, {"games": 0, "ticks": 0, "seconds": 0.0})
+            stats["games"] += len(chunk_results)
+            stats["ticks"] += sum(result["ticks"] for result in chunk_results)
+            stats["seconds"] += elapsed
+    return results, worker_stats
+
+def summarize(results, worker_stats):
+    """Aggregate game results into a JSON-friendly summary dict.
+
+    ``score`` is None when there are no results.
+    """
+    scores = sorted(result["score"] for result in results)
+    lives_lost = Counter()
+    for result in results:
+        lives_lost.update(result["lives_lost"])
+    return {
+        "games": len(results),
+        "finished": sum(result["finished"] for result in results),
+        "score": {
+            "mean": statistics.fmean(scores),
+            "median": statistics.median(scores),
+            "p90": scores[int(0.9 * (len(scores) - 1))],
+            "max": scores[-1],
+        } if scores else None,
+        "levels": dict(sorted(Counter(result["level"] for result in results).items())),
+        "lives_lost": dict(lives_lost),
+        "workers": {
+            str(pid): dict(stats, ticks_per_second=stats["ticks"] / stats["seconds"] if stats["seconds"] else 0.0)
+            for pid, stats in worker_stats.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless snake games across all CPU cores.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--agent", choices=sorted(agents), default="autoplay", help="who steers the snake")
+    parser.add_argument("--level", type=int, default=1, help="starting level")
+    parser.add_argument("--speed", type=int, default=initial_speed, help="starting snake speed")
+    parser.add_argument("--max-ticks", type=int, help="stop each game after this many ticks")
+    parser.add_argument("--grid", type=parse_grid, metavar="COLSxROWS", help="board size in cells")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, help="games handed to a worker at a time")
+    parser.add_argument("--json", metavar="PATH", help="also write the summary to PATH as JSON")
+    parser.add_argument("--scores", metavar="DB", help="record every game in the high score database DB")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.speed < 1:
+        parser.error("--speed must be at least 1")
+
+    board = {}
+    if args.grid:
+        board = {"width": args.grid[0] * block_size, "height": args.grid[1] * block_size}
+
+    start = time.perf_counter()
+    results, worker_stats = run(args.games, args.seed, args.workers, args.chunk_size, agent=args.agent,
+                                level=args.level, speed=args.speed, max_ticks=args.max_ticks, **board)
+    summary = summarize(results, worker_stats)
+    summary["seconds"] = time.perf_counter() - start
+
+    score = summary["score"]
+    print(f"{summary['games']} games ({summary['finished']} finished) in {summary['seconds']:.1f}s")
+    print(f"score: mean {score['mean']:.2f}, median {score['median']}, p90 {score['p90']}, max {score['max']}")
+    print("levels reached: " + ", ".join(f"{level}: {n}" for level, n in summary["levels"].items()))
+    print("lives lost: " + ", ".join(f"{cause}: {n}" for cause, n in summary["lives_lost"].items()))
+    for pid, stats in summary["workers"].items():
+        print(f"worker {pid}: {stats['games']} games, {stats['ticks_per_second']:.0f} ticks/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.scores:
+        # One batched transaction for the whole run, written from this process only
+        store = ScoreStore(args.scores)
+        store.add_many([dict(result, player=args.agent) for result in results])
+        store.close()
+
+if __name__ == "__main__":
+    main()